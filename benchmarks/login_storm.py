@@ -0,0 +1,76 @@
+""" Measures GET /task/{id} latency alone and during a storm of logins.
+
+Run against a started service (docker-compose up -d):
+    python benchmarks/login_storm.py --logins 400 --login-workers 16
+With hashing on the event loop p99 grows with the storm, with the process hashing pool it stays flat.
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(values: list[float], q: float) -> float:
+    """ Returns q-th percentile of values in milliseconds"""
+
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000
+
+
+def register(url: str, login: str, password: str) -> str:
+    """ Registers or authenticates a user and returns his token"""
+
+    resp = requests.post(url + '/user', json={"login": login, "password": password,
+                                              "first_name": "Bench", "second_name": "Bench"})
+    if resp.status_code == 409:
+        resp = requests.post(url + '/user/authentication', json={"login": login, "password": password})
+    return resp.json()["access_token"]
+
+
+def measure_reads(url: str, token: str, task_id: int, stop: threading.Event, count: int) -> list[float]:
+    """ Sequentially reads a task and returns latencies in seconds"""
+
+    latencies = []
+    with requests.Session() as http:
+        http.headers["token"] = token
+        while not stop.is_set() and len(latencies) < count:
+            started = time.perf_counter()
+            http.get(f"{url}/task/{task_id}")
+            latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def report(name: str, latencies: list[float]):
+    print(f"{name:>14}: n={len(latencies)} p50={percentile(latencies, 0.5):.1f}ms "
+          f"p99={percentile(latencies, 0.99):.1f}ms mean={statistics.mean(latencies) * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--reads", type=int, default=500)
+    parser.add_argument("--logins", type=int, default=400)
+    parser.add_argument("--login-workers", type=int, default=16)
+    args = parser.parse_args()
+
+    token = register(args.url, "bench_user", "bench_password")
+    task_id = requests.post(args.url + '/task', json={"title": "bench", "content": "bench"},
+                            headers={"token": token}).json()["task_id"]
+
+    report("idle", measure_reads(args.url, token, task_id, threading.Event(), args.reads))
+
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=args.login_workers) as pool:
+        for _ in range(args.logins):
+            pool.submit(requests.post, args.url + '/user/authentication',
+                        json={"login": "bench_user", "password": "bench_password"})
+        latencies = measure_reads(args.url, token, task_id, stop, args.reads)
+        stop.set()
+    report("login storm", latencies)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,31 @@ import os
 class Settings(BaseSettings):
     database_url: str = "postgresql+asyncpg://{}:{}@postgresql:5432/{}".format(
         os.getenv("POSTGRES_USER"), os.getenv("POSTGRES_PASSWORD"), os.getenv("POSTGRES_DB"))
+    database_echo: bool = False
+    database_pool_size: int = 10
+    database_max_overflow: int = 10  # -1 - unlimited
+    database_pool_timeout: float = 30
+    database_pool_recycle: int = 1800  # seconds, -1 - never recycle
+    database_pool_pre_ping: bool = True
+    database_statement_cache_size: int = 100  # asyncpg prepared statements per connection
+    load_shedding_wait_threshold: float = 0.5  # pool checkout wait in seconds considered slow
+    load_shedding_window: float = 5  # seconds a slow checkout keeps a saturated pool shedding
+    load_shedding_retry_after: int = 1
     algorithm: str = "HS256"
     jwt_secret_key: str = os.environ.get("JWT_SECRET_KEY")
+    access_token_expire_minutes: int = 24 * 60
+    user_cache_size: int = 10000
+    user_cache_ttl: float = 300
+    access_cache_size: int = 100000
+    access_cache_ttl: float = 60
+    access_cache_policy: str = "lru"  # lru or fifo
+    cache_broker: str = "memory"  # memory - single worker, unix - workers share invalidations via sockets
+    cache_broker_path: str = "/tmp/task_service_cache"
+    max_batch_size: int = 1000
+    search_language: str = "simple"  # Postgres text search configuration of the task index
+    password_hash_executor: str = "process"  # process or thread
+    password_hash_workers: int = 4
+    password_hash_rounds: int = 535000
 
 
 settings = Settings()
@@ -1,13 +1,96 @@
+import time
+
 import sqlalchemy.orm
+from sqlalchemy import event, make_url
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from config import settings
+from utils import metrics
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """ Queue pool recording how long requests wait for a connection"""
+
+    last_slow_checkout: float = 0
+
+    def is_full(self) -> bool:
+        """ Every connection including overflow is in use, negative max overflow is unlimited"""
+
+        return 0 <= settings.database_max_overflow <= self.overflow()
+
+    def _do_get(self):
+        if not self.is_full():
+            # An idle connection is taken or a new one is opened, nothing is queued
+            metrics.pool_checkout_wait.observe(0)
+            return super()._do_get()
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            metrics.pool_checkout_wait.observe(waited)
+            if waited > settings.load_shedding_wait_threshold:
+                self.last_slow_checkout = time.monotonic()
+
+    def is_saturated(self) -> bool:
+        """ Pool is saturated when every connection is in use and checkouts were slow recently"""
+
+        return self.is_full() and time.monotonic() - self.last_slow_checkout < settings.load_shedding_window
+
+
+def is_memory_database(database_url: str) -> bool:
+    url = make_url(database_url)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
 
-engine = create_async_engine(settings.database_url, echo=True)
+
+def engine_options(database_url: str) -> dict:
+    """ Returns pool and driver options for create_async_engine from settings"""
+
+    if is_memory_database(database_url):
+        # In-memory SQLite lives in a single connection, keep its default static pool
+        return dict(echo=settings.database_echo)
+    options = dict(echo=settings.database_echo,
+                   poolclass=TimedQueuePool,
+                   pool_size=settings.database_pool_size,
+                   max_overflow=settings.database_max_overflow,
+                   pool_timeout=settings.database_pool_timeout,
+                   pool_recycle=settings.database_pool_recycle,
+                   pool_pre_ping=settings.database_pool_pre_ping)
+    if database_url.startswith("postgresql+asyncpg"):
+        options["connect_args"] = {"prepared_statement_cache_size": settings.database_statement_cache_size}
+    return options
+
+
+engine = create_async_engine(settings.database_url, **engine_options(settings.database_url))
+event.listen(engine.sync_engine, "before_cursor_execute", metrics.before_cursor_execute)
+event.listen(engine.sync_engine, "after_cursor_execute", metrics.after_cursor_execute)
+
+
+def pool_connections(pool) -> dict[tuple, int]:
+    if not isinstance(pool, TimedQueuePool):
+        return {}
+    return {("checked_out",): pool.checkedout(),
+            ("checked_in",): pool.checkedin(),
+            ("overflow",): max(pool.overflow(), 0),
+            ("size",): pool.size()}
+
+
+metrics.Gauge("db_pool_connections", "Connections of the pool by state", ("state",),
+              lambda: pool_connections(engine.pool))
 Base = sqlalchemy.orm.declarative_base()
 async_session = async_sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
 
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine.sync_engine, "connect")
+    def enable_foreign_keys(dbapi_connection, connection_record):
+        """ Local SQLite database needs foreign keys for ON DELETE CASCADE"""
+
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
 
 async def get_session() -> AsyncSession:
     """Getting async session"""
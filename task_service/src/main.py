@@ -1,14 +1,26 @@
 from fastapi import FastAPI
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 import uvicorn
-from routers import user, task, permission
+from routers import user, task, permission, service
 import asyncio
 from database import init_models
+from utils.admission import LoadSheddingMiddleware, pool_timeout_handler
+from utils.broker import broker
+from utils.metrics import MetricsMiddleware
+from utils.password import shutdown_executor
 
 app = FastAPI()
+app.add_middleware(LoadSheddingMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_exception_handler(PoolTimeoutError, pool_timeout_handler)
+app.add_event_handler("startup", broker.start)
+app.add_event_handler("shutdown", broker.stop)
+app.add_event_handler("shutdown", shutdown_executor)
 
 app.include_router(user.router)
 app.include_router(task.router)
 app.include_router(permission.router)
+app.include_router(service.router)
 
 if __name__ == "__main__":
     asyncio.run(init_models())
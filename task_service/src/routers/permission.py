@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy import select
+from sqlalchemy import update, delete
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import JSONResponse
@@ -7,8 +7,9 @@ from fastapi.responses import JSONResponse
 from database import get_session
 from schemas import permission_schemas
 from tables.permission_dao import PermissionDao
-from tables.task_dao import TaskDao
+from tables.queries import fetch_grant_target
 from tables.user_dao import UserDao
+from utils.access import invalidate_access
 from utils.auth import get_user
 
 router = APIRouter(prefix="/permission", tags=["permission"])
@@ -22,33 +23,26 @@ async def post_change_rights(permission_data: permission_schemas.NewRight,
 
     if permission_data.access_mode not in [1, 2]:
         return JSONResponse(status_code=400, content="Access modes : 1 - view, 2 - change")
-    task: TaskDao = (
-        await session.execute(
-            select(TaskDao).where(TaskDao.id == permission_data.task_id)
-        )).unique().scalars().one_or_none()
-    if not task:
+    target = await fetch_grant_target(session, permission_data.task_id, permission_data.access_user_login)
+    if not target:
         return JSONResponse(status_code=404, content=f"Task with id = {permission_data.task_id} not found")
-    if user.id != task.user_id:
+    if user.id != target.creator_id:
         return JSONResponse(status_code=403, content="Only a creator can provide access")
-    access_user: UserDao = (
-        await session.execute(
-            select(UserDao).where(UserDao.login == permission_data.access_user_login))).unique().scalars().one_or_none()
-    if not access_user:
+    if not target.access_user_id:
         return JSONResponse(status_code=404, content=f"User {permission_data.access_user_login} does not exist")
 
-    if user.id == access_user.id:
+    if user.id == target.access_user_id:
         return JSONResponse(status_code=400, content="Creator can't change his rights")
 
-    permission: PermissionDao = (
+    if target.access_mode:
         await session.execute(
-            select(PermissionDao).where(PermissionDao.access_user_id == access_user.id,
+            update(PermissionDao).where(PermissionDao.access_user_id == target.access_user_id,
                                         PermissionDao.task_id == permission_data.task_id)
-        )).unique().scalars().one_or_none()
-    if permission:
-        permission.access_mode = permission_data.access_mode
+            .values(access_mode=permission_data.access_mode))
         await session.commit()
+        invalidate_access(target.access_user_id, permission_data.task_id)
         return
-    new_permission = PermissionDao(access_user_id=access_user.id,
+    new_permission = PermissionDao(access_user_id=target.access_user_id,
                                    task_id=permission_data.task_id,
                                    access_mode=permission_data.access_mode)
     session.add(new_permission)
@@ -56,6 +50,7 @@ async def post_change_rights(permission_data: permission_schemas.NewRight,
         await session.commit()
     except IntegrityError:
         return JSONResponse(status_code=400, content="Incorrect data")
+    invalidate_access(target.access_user_id, permission_data.task_id)
 
 
 @router.delete("/{access_user_login}/{task_id}", status_code=204, summary="Take away rights to change/view a task")
@@ -65,31 +60,22 @@ async def delete_rights(access_user_login: str,
                         session: AsyncSession = Depends(get_session)):
     """ Deletes viewing/changing rights"""
 
-    task: TaskDao = (
-        await session.execute(
-            select(TaskDao).where(TaskDao.id == task_id)
-        )).unique().scalars().one_or_none()
-    if not task:
+    target = await fetch_grant_target(session, task_id, access_user_login)
+    if not target:
         return JSONResponse(status_code=404, content=f"Task with id = {task_id} not found")
-    if user.id != task.user_id:
+    if user.id != target.creator_id:
         return JSONResponse(status_code=403, content="Only a creator can take away rights")
-
-    access_user: UserDao = (
-        await session.execute(
-            select(UserDao).where(UserDao.login == access_user_login))).unique().scalars().one_or_none()
-    if not access_user:
+    if not target.access_user_id:
         return JSONResponse(status_code=404, content=f"User {access_user_login} does not exist")
 
-    if user.id == access_user.id:
+    if user.id == target.access_user_id:
         return JSONResponse(status_code=400, content="Creator can't change his rights")
 
-    permission: PermissionDao = (
-        await session.execute(
-            select(PermissionDao).where(PermissionDao.access_user_id == access_user.id,
-                                        PermissionDao.task_id == task_id)
-        )).unique().scalars().one_or_none()
-    if not permission:
+    if not target.access_mode:
         return JSONResponse(status_code=404,
                             content=f"Viewing/changing right were not given to {access_user_login}")
-    await session.delete(permission)
+    await session.execute(
+        delete(PermissionDao).where(PermissionDao.access_user_id == target.access_user_id,
+                                    PermissionDao.task_id == task_id))
     await session.commit()
+    invalidate_access(target.access_user_id, task_id)
@@ -0,0 +1,22 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from utils.cache import caches
+from utils.metrics import render_metrics
+
+router = APIRouter(tags=["service"])
+
+
+@router.get("/cache/stats", status_code=200, summary="Get in-process cache counters")
+async def get_cache_stats():
+    """ Returns size, hits, misses and evictions of every in-process cache"""
+
+    return {name: cache.stats() for name, cache in caches.items()}
+
+
+@router.get("/metrics", status_code=200, summary="Get metrics in Prometheus text format",
+            response_class=PlainTextResponse)
+async def get_metrics():
+    """ Returns per-route latency histograms, SQL statement timings, pool waits and cache counters"""
+
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select, insert, update, delete
 from sqlalchemy.exc import DBAPIError, DataError, IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import JSONResponse
 
+from config import settings
 from database import get_session
 from tables.user_dao import UserDao
 from tables.task_dao import TaskDao
 from tables.permission_dao import PermissionDao
+from tables import queries
+from tables.queries import fetch_many_access
+from utils.access import get_access, invalidate_task_access
 from utils.auth import get_user
 from schemas import task_schemas
 
@@ -36,33 +40,127 @@ async def post_task(task_data: task_schemas.NewTask,
     return task_schemas.TaskId(task_id=new_task.id)
 
 
+@router.post("/batch", status_code=201, summary="Create many tasks", response_model=list[task_schemas.BatchResult])
+async def post_tasks(tasks_data: list[task_schemas.NewTask],
+                     user: UserDao = Depends(get_user),
+                     session: AsyncSession = Depends(get_session)):
+    """ Posts many tasks in one transaction. User automatically has changing rights on each of them"""
+
+    if len(tasks_data) > settings.max_batch_size:
+        return JSONResponse(status_code=400, content=f"Batch size is limited to {settings.max_batch_size}")
+    if not tasks_data:
+        return []
+
+    try:
+        task_ids = (await session.scalars(
+            insert(TaskDao).returning(TaskDao.id, sort_by_parameter_order=True),
+            [{"user_id": user.id, "title": task.title, "content": task.content} for task in tasks_data]
+        )).all()
+        await session.execute(
+            insert(PermissionDao),
+            [{"access_user_id": user.id, "task_id": task_id, "access_mode": 2} for task_id in task_ids]
+        )
+        await session.commit()
+    except (DBAPIError, DataError, IntegrityError):
+        await session.rollback()
+        return JSONResponse(status_code=400, content="Incorrect data")
+    return [task_schemas.BatchResult(task_id=task_id, status_code=201) for task_id in task_ids]
+
+
+@router.put("/batch", status_code=200, summary="Update many tasks", response_model=list[task_schemas.BatchResult])
+async def update_tasks(tasks_data: list[task_schemas.UpdateTask],
+                       user: UserDao = Depends(get_user),
+                       session: AsyncSession = Depends(get_session)):
+    """ Updates many tasks in one transaction. Tasks without changing rights are skipped"""
+
+    if len(tasks_data) > settings.max_batch_size:
+        return JSONResponse(status_code=400, content=f"Batch size is limited to {settings.max_batch_size}")
+    if not tasks_data:
+        return []
+
+    access = await fetch_many_access(session, user.id, [task.task_id for task in tasks_data])
+    results = []
+    updates = {}
+    for task in tasks_data:
+        if task.task_id in updates:
+            results.append(task_schemas.BatchResult(task_id=task.task_id, status_code=400,
+                                                    detail="Duplicate task id in batch"))
+        elif task.task_id not in access:
+            results.append(task_schemas.BatchResult(task_id=task.task_id, status_code=404,
+                                                    detail=f"Task with id = {task.task_id} not found"))
+        elif access[task.task_id].access_mode != 2:
+            results.append(task_schemas.BatchResult(task_id=task.task_id, status_code=403,
+                                                    detail="Resource is forbidden"))
+        else:
+            updates[task.task_id] = {"id": task.task_id, "title": task.new_title, "content": task.new_content}
+            results.append(task_schemas.BatchResult(task_id=task.task_id, status_code=200))
+
+    if updates:
+        try:
+            await session.execute(update(TaskDao), list(updates.values()))
+            await session.commit()
+        except (DBAPIError, DataError):
+            await session.rollback()
+            return JSONResponse(status_code=400, content="Incorrect data")
+    return results
+
+
+@router.delete("/batch", status_code=200, summary="Delete many tasks", response_model=list[task_schemas.BatchResult])
+async def delete_tasks(task_ids: list[int],
+                       user: UserDao = Depends(get_user),
+                       session: AsyncSession = Depends(get_session)):
+    """ Deletes many tasks by their ids in one transaction. Only creator can do this"""
+
+    if len(task_ids) > settings.max_batch_size:
+        return JSONResponse(status_code=400, content=f"Batch size is limited to {settings.max_batch_size}")
+    task_ids = list(dict.fromkeys(task_ids))
+    if not task_ids:
+        return []
+
+    access = await fetch_many_access(session, user.id, task_ids)
+    results = []
+    to_delete = []
+    for task_id in task_ids:
+        if task_id not in access:
+            results.append(task_schemas.BatchResult(task_id=task_id, status_code=404,
+                                                    detail=f"Task with id = {task_id} not found"))
+        elif access[task_id].creator_id != user.id:
+            results.append(task_schemas.BatchResult(task_id=task_id, status_code=403,
+                                                    detail="Resource is forbidden"))
+        else:
+            to_delete.append(task_id)
+            results.append(task_schemas.BatchResult(task_id=task_id, status_code=204))
+
+    if to_delete:
+        await session.execute(delete(TaskDao).where(TaskDao.id.in_(to_delete)))
+        await session.commit()
+        for task_id in to_delete:
+            invalidate_task_access(task_id)
+    return results
+
+
 @router.put("", status_code=200, summary="Update a task")
 async def update_task(task_data: task_schemas.UpdateTask,
                       user: UserDao = Depends(get_user),
                       session: AsyncSession = Depends(get_session)):
     """ Updates task's content and title by its id. User should has changing rights"""
 
-    task: TaskDao = (
-        await session.execute(
-            select(TaskDao).where(TaskDao.id == task_data.task_id)
-        )).unique().scalars().one_or_none()
-    if not task:
+    access = await get_access(session, user.id, task_data.task_id)
+    if not access:
         return JSONResponse(status_code=404, content=f"Task with id = {task_data.task_id} not found")
-
-    permission: PermissionDao = (
-        await session.execute(
-            select(PermissionDao).where(PermissionDao.access_user_id == user.id,
-                                        PermissionDao.task_id == task_data.task_id, PermissionDao.access_mode == 2)
-        )).unique().scalars().one_or_none()
-    if not permission:
+    if access.access_mode != 2:
         return JSONResponse(status_code=403, content="Resource is forbidden")
 
-    task.title = task_data.new_title
-    task.content = task_data.new_content
     try:
+        result = await session.execute(
+            update(TaskDao).where(TaskDao.id == task_data.task_id)
+            .values(title=task_data.new_title, content=task_data.new_content))
         await session.commit()
-    except DBAPIError or DataError:
+    except (DBAPIError, DataError):
         return JSONResponse(status_code=400, content="Incorrect data")
+    if not result.rowcount:
+        invalidate_task_access(task_data.task_id)
+        return JSONResponse(status_code=404, content=f"Task with id = {task_data.task_id} not found")
 
 
 @router.delete("/{task_id}", status_code=204, summary="Delete a task")
@@ -71,16 +169,78 @@ async def delete_task(task_id: int,
                       session: AsyncSession = Depends(get_session)):
     """ Deletes task by its id. Only creator can do this"""
 
-    task: TaskDao = (
-        await session.execute(
-            select(TaskDao).where(TaskDao.id == task_id)
-        )).unique().scalars().one_or_none()
-    if not task:
+    access = await get_access(session, user.id, task_id)
+    if not access:
         return JSONResponse(status_code=404, content=f"Task with id = {task_id} not found")
-    if user.id != task.user_id:
+    if user.id != access.creator_id:
         return JSONResponse(status_code=403, content="Resource is forbidden")
-    await session.delete(task)
+    await session.execute(delete(TaskDao).where(TaskDao.id == task_id))
     await session.commit()
+    invalidate_task_access(task_id)
+
+
+@router.get("", status_code=200, summary="List available tasks", response_model=task_schemas.TaskPage)
+async def list_tasks(after: int | None = None,
+                     limit: int = Query(50, ge=1, le=100),
+                     access_mode: int | None = None,
+                     user: UserDao = Depends(get_user),
+                     session: AsyncSession = Depends(get_session)):
+    """ Returns tasks that user can view or change, ordered by id.
+    Pass next_cursor of a previous page as `after` to get the next page"""
+
+    if access_mode is not None and access_mode not in [1, 2]:
+        return JSONResponse(status_code=400, content="Access modes : 1 - view, 2 - change")
+
+    # Creator always gets a changing permission on post, so one join over permission
+    # covers both owned and shared tasks and walks the (access_user_id, task_id) primary key
+    query = (select(TaskDao, PermissionDao.access_mode)
+             .join(PermissionDao, PermissionDao.task_id == TaskDao.id)
+             .where(PermissionDao.access_user_id == user.id)
+             .order_by(PermissionDao.task_id)
+             .limit(limit + 1))
+    if after is not None:
+        query = query.where(PermissionDao.task_id > after)
+    if access_mode is not None:
+        query = query.where(PermissionDao.access_mode == access_mode)
+    rows = (await session.execute(query)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1][0].id
+    tasks = [task_schemas.TaskItem(id=task.id, user_id=task.user_id, title=task.title,
+                                   content=task.content, access_mode=mode) for task, mode in rows]
+    return task_schemas.TaskPage(tasks=tasks, next_cursor=next_cursor)
+
+
+@router.get("/search", status_code=200, summary="Search tasks by title and content",
+            response_model=task_schemas.SearchPage)
+async def search_tasks(q: str,
+                       after: str | None = None,
+                       limit: int = Query(50, ge=1, le=100),
+                       user: UserDao = Depends(get_user),
+                       session: AsyncSession = Depends(get_session)):
+    """ Returns available tasks matching a full-text query, best ranked first.
+    Pass next_cursor of a previous page as `after` to get the next page"""
+
+    if not q.strip():
+        return JSONResponse(status_code=400, content="Empty search query")
+    cursor = None
+    if after is not None:
+        try:
+            rank, task_id = after.split(":")
+            cursor = (float(rank), int(task_id))
+        except ValueError:
+            return JSONResponse(status_code=400, content="Incorrect cursor")
+
+    rows = await queries.search_tasks(session, user.id, q, limit + 1, cursor)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = f"{rows[-1].rank!r}:{rows[-1][0].id}"
+    tasks = [task_schemas.FoundTask(id=task.id, user_id=task.user_id, title=task.title, content=task.content,
+                                    access_mode=mode, rank=rank) for task, mode, rank in rows]
+    return task_schemas.SearchPage(tasks=tasks, next_cursor=next_cursor)
 
 
 @router.get("/{task_id}", status_code=200, summary="Get a task", response_model=task_schemas.Task)
@@ -89,19 +249,17 @@ async def get_task(task_id: int,
                    session: AsyncSession = Depends(get_session)):
     """ Returns task by its id. User should has viewing or changing rights"""
 
+    access = await get_access(session, user.id, task_id)
+    if not access:
+        return JSONResponse(status_code=404, content=f"Task with id = {task_id} not found")
+    if not access.access_mode:
+        return JSONResponse(status_code=403, content="Resource is forbidden")
+
     task: TaskDao = (
         await session.execute(
             select(TaskDao).where(TaskDao.id == task_id)
         )).unique().scalars().one_or_none()
     if not task:
+        invalidate_task_access(task_id)
         return JSONResponse(status_code=404, content=f"Task with id = {task_id} not found")
-
-    permission: PermissionDao = (
-        await session.execute(
-            select(PermissionDao).where(PermissionDao.access_user_id == user.id,
-                                        PermissionDao.task_id == task_id)
-        )).unique().scalars().one_or_none()
-    if not permission:
-        return JSONResponse(status_code=403, content="Resource is forbidden")
-
     return task
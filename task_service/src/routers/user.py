@@ -8,6 +8,7 @@ from database import get_session
 from schemas import user_schemas
 from utils.password import encrypt_password, check_encrypted_password
 from tables.user_dao import UserDao
+from utils.auth import user_cache
 
 router = APIRouter(prefix="/user", tags=["user"])
 
@@ -17,7 +18,7 @@ async def registration(user_to_post: user_schemas.UserRegistration,
                        session: AsyncSession = Depends(get_session)):
     """ Registers user by login, password, name and surname. Returns token of a session"""
 
-    user_to_post.password = encrypt_password(user_to_post.password)
+    user_to_post.password = await encrypt_password(user_to_post.password)
     new_user: UserDao = UserDao(first_name=user_to_post.first_name,
                                 second_name=user_to_post.second_name,
                                 login=user_to_post.login,
@@ -43,6 +44,12 @@ async def authentication(authentication_data: user_schemas.UserAuthentication,
             select(UserDao).where(UserDao.login == authentication_data.login))).unique().scalars().one_or_none()
     if not user:
         return JSONResponse(status_code=404, content=f"User {authentication_data.login} does not exist")
-    if not check_encrypted_password(authentication_data.password, user.password):
+    is_valid, new_hash = await check_encrypted_password(authentication_data.password, user.password)
+    if not is_valid:
         return JSONResponse(status_code=400, content="Incorrect password")
+    if new_hash:
+        # Legacy md5_crypt hash is replaced with the current scheme
+        user.password = new_hash
+        await session.commit()
+        user_cache.invalidate(user.id)
     return user_schemas.Token(access_token=user.get_token())
@@ -16,8 +16,32 @@ class TaskId(BaseModel):
     task_id: int
 
 
+class BatchResult(BaseModel):
+    task_id: int | None = None
+    status_code: int
+    detail: str | None = None
+
+
 class Task(BaseModel):
     id: int
     user_id: int
     title: str
     content: str
+
+
+class TaskItem(Task):
+    access_mode: int
+
+
+class TaskPage(BaseModel):
+    tasks: list[TaskItem]
+    next_cursor: int | None = None
+
+
+class FoundTask(TaskItem):
+    rank: float
+
+
+class SearchPage(BaseModel):
+    tasks: list[FoundTask]
+    next_cursor: str | None = None
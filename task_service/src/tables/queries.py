@@ -0,0 +1,99 @@
+import re
+from typing import NamedTuple
+
+from sqlalchemy import select, and_, or_, func, literal_column, text, table, column, cast
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from tables.permission_dao import PermissionDao
+from tables.task_dao import TaskDao
+from tables.user_dao import UserDao
+
+
+task_fts = table("task_fts", column("rowid"))
+
+
+class Access(NamedTuple):
+    creator_id: int
+    access_mode: int  # 0 - no rights, 1 - view, 2 - change
+
+
+class GrantTarget(NamedTuple):
+    creator_id: int
+    access_user_id: int | None  # None if there is no user with such login
+    access_mode: int  # current mode of access user, 0 - no rights
+
+
+def _access_query(user_id: int):
+    return (select(TaskDao.id, TaskDao.user_id, PermissionDao.access_mode)
+            .outerjoin(PermissionDao, and_(PermissionDao.task_id == TaskDao.id,
+                                           PermissionDao.access_user_id == user_id)))
+
+
+async def fetch_access(session: AsyncSession, user_id: int, task_id: int) -> Access | None:
+    """ Returns creator of a task and user's access mode on it in one query, None if task does not exist"""
+
+    row = (await session.execute(_access_query(user_id).where(TaskDao.id == task_id))).one_or_none()
+    if row is None:
+        return None
+    return Access(creator_id=row.user_id, access_mode=row.access_mode or 0)
+
+
+async def fetch_many_access(session: AsyncSession, user_id: int, task_ids: list[int]) -> dict[int, Access]:
+    """ Returns {task_id: access} for existing tasks among task_ids in one query"""
+
+    rows = (await session.execute(_access_query(user_id).where(TaskDao.id.in_(task_ids)))).all()
+    return {row.id: Access(creator_id=row.user_id, access_mode=row.access_mode or 0) for row in rows}
+
+
+async def fetch_grant_target(session: AsyncSession, task_id: int, access_user_login: str) -> GrantTarget | None:
+    """ Returns creator of a task, id of user with access_user_login and his current access mode
+    in one query, None if task does not exist"""
+
+    row = (
+        await session.execute(
+            select(TaskDao.user_id, UserDao.id.label("access_user_id"), PermissionDao.access_mode)
+            .select_from(TaskDao)
+            .outerjoin(UserDao, UserDao.login == access_user_login)
+            .outerjoin(PermissionDao, and_(PermissionDao.task_id == TaskDao.id,
+                                           PermissionDao.access_user_id == UserDao.id))
+            .where(TaskDao.id == task_id)
+        )).one_or_none()
+    if row is None:
+        return None
+    return GrantTarget(creator_id=row.user_id, access_user_id=row.access_user_id, access_mode=row.access_mode or 0)
+
+
+async def search_tasks(session: AsyncSession, user_id: int, query: str, limit: int,
+                       after: tuple[float, int] | None = None) -> list[tuple[TaskDao, int, float]]:
+    """ Returns (task, access mode, rank) of tasks available to user that match query,
+    best ranked first. after is (rank, id) of the last task of a previous page"""
+
+    if session.bind.dialect.name == "sqlite":
+        words = re.findall(r"\w+", query)
+        if not words:
+            return []
+        # bm25 is lower for better matches, negated to keep "higher is better" for cursors
+        rank = (-func.bm25(literal_column("task_fts"))).label("rank")
+        statement = (
+            select(TaskDao, PermissionDao.access_mode, rank)
+            .join(task_fts, task_fts.c.rowid == TaskDao.id)
+            .where(text("task_fts MATCH :match").bindparams(match=" ".join(f'"{word}"' for word in words))))
+    else:
+        ts_query = func.websearch_to_tsquery(cast(settings.search_language, REGCONFIG), query)
+        search_vector = literal_column("task.search_vector")
+        rank = func.ts_rank(search_vector, ts_query).label("rank")
+        statement = (
+            select(TaskDao, PermissionDao.access_mode, rank)
+            .where(search_vector.op("@@")(ts_query)))
+
+    statement = (statement
+                 .join(PermissionDao, PermissionDao.task_id == TaskDao.id)
+                 .where(PermissionDao.access_user_id == user_id)
+                 .order_by(rank.desc(), TaskDao.id)
+                 .limit(limit))
+    if after is not None:
+        after_rank, after_id = after
+        statement = statement.where(or_(rank < after_rank, and_(rank == after_rank, TaskDao.id > after_id)))
+    return (await session.execute(statement)).all()
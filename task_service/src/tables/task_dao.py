@@ -1,4 +1,5 @@
-from sqlalchemy import Column, PrimaryKeyConstraint, Index, VARCHAR, INTEGER, ForeignKeyConstraint
+from sqlalchemy import Column, PrimaryKeyConstraint, Index, VARCHAR, INTEGER, ForeignKeyConstraint, DDL, event
+from config import settings
 from database import Base
 
 
@@ -14,3 +15,25 @@ class TaskDao(Base):
         Index("user_index", "user_id"),
         ForeignKeyConstraint(['user_id'], ['user.id'])
     )
+
+
+# Full-text index over title and content: tsvector column with GIN index on Postgres,
+# external content FTS5 table kept in sync by triggers on SQLite
+for statement in (
+        f"ALTER TABLE task ADD COLUMN search_vector tsvector GENERATED ALWAYS AS "
+        f"(to_tsvector('{settings.search_language}', title || ' ' || content)) STORED",
+        "CREATE INDEX task_search_index ON task USING GIN (search_vector)"):
+    event.listen(TaskDao.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+for statement in (
+        "CREATE VIRTUAL TABLE task_fts USING fts5(title, content, content='task', content_rowid='id')",
+        "CREATE TRIGGER task_fts_insert AFTER INSERT ON task BEGIN "
+        "INSERT INTO task_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+        "CREATE TRIGGER task_fts_delete AFTER DELETE ON task BEGIN "
+        "INSERT INTO task_fts(task_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); "
+        "END",
+        "CREATE TRIGGER task_fts_update AFTER UPDATE ON task BEGIN "
+        "INSERT INTO task_fts(task_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); "
+        "INSERT INTO task_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END"):
+    event.listen(TaskDao.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(TaskDao.__table__, "before_drop", DDL("DROP TABLE IF EXISTS task_fts").execute_if(dialect="sqlite"))
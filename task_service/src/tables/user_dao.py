@@ -1,6 +1,8 @@
 from sqlalchemy import Column, INTEGER, VARCHAR, PrimaryKeyConstraint, Index
 from database import Base
 import jwt
+import uuid
+from datetime import datetime, timedelta, timezone
 from config import settings
 
 
@@ -18,6 +20,12 @@ class UserDao(Base):
     )
 
     def get_token(self):
-        token = jwt.encode({'user_id': self.id}, key=settings.jwt_secret_key,
+        issued_at = datetime.now(tz=timezone.utc)
+        token = jwt.encode({'user_id': self.id,
+                            'login': self.login,
+                            'iat': issued_at,
+                            'exp': issued_at + timedelta(minutes=settings.access_token_expire_minutes),
+                            'jti': uuid.uuid4().hex},
+                           key=settings.jwt_secret_key,
                            algorithm=settings.algorithm)
         return token
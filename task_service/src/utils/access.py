@@ -0,0 +1,89 @@
+from collections import defaultdict
+from typing import Hashable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from tables.queries import Access, fetch_access
+from utils.broker import invalidate
+from utils.cache import TTLCache
+
+
+GENERATION_STRIPES = 4096
+
+
+class AccessCache(TTLCache):
+    """ Access decisions keyed by (user_id, task_id) with an index of cached users per task.
+    Every invalidation bumps the generation of the task, so a decision read from the database
+    before a concurrent invalidation is not cached after it"""
+
+    def __init__(self, name: str, max_size: int, ttl: float, policy: str = "lru"):
+        super().__init__(name, max_size, ttl, policy)
+        self._users_by_task: dict[int, set[int]] = defaultdict(set)
+        # Generations are striped by task id to stay bounded, a collision only skips caching
+        self._generations = [0] * GENERATION_STRIPES
+
+    def generation(self, task_id: int) -> int:
+        return self._generations[task_id % GENERATION_STRIPES]
+
+    def set(self, key: tuple[int, int], value: Access):
+        self._users_by_task[key[1]].add(key[0])
+        super().set(key, value)
+
+    def set_if_current(self, key: tuple[int, int], value: Access, generation: int):
+        """ Stores decision unless the task was invalidated since generation was read"""
+
+        if self.generation(key[1]) == generation:
+            self.set(key, value)
+
+    def invalidate(self, key: tuple[int, int]):
+        self._generations[key[1] % GENERATION_STRIPES] += 1
+        super().invalidate(key)
+
+    def clear(self):
+        self._generations = [generation + 1 for generation in self._generations]
+        super().clear()
+
+    def _removed(self, key: Hashable):
+        user_id, task_id = key
+        users = self._users_by_task.get(task_id)
+        if users is not None:
+            users.discard(user_id)
+            if not users:
+                del self._users_by_task[task_id]
+
+    def invalidate_task(self, task_id: int):
+        """ Drops decisions of all users on a task"""
+
+        self._generations[task_id % GENERATION_STRIPES] += 1
+        for user_id in list(self._users_by_task.get(task_id, ())):
+            self.invalidate((user_id, task_id))
+
+
+access_cache = AccessCache("access", max_size=settings.access_cache_size, ttl=settings.access_cache_ttl,
+                           policy=settings.access_cache_policy)
+
+
+async def get_access(session: AsyncSession, user_id: int, task_id: int) -> Access | None:
+    """ Returns creator of a task and user's access mode on it, None if task does not exist"""
+
+    access: Access = access_cache.get((user_id, task_id))
+    if access is not None:
+        return access
+    generation = access_cache.generation(task_id)
+    access = await fetch_access(session, user_id, task_id)
+    if access is not None:
+        access_cache.set_if_current((user_id, task_id), access, generation)
+    return access
+
+
+def invalidate_access(user_id: int, task_id: int):
+    """ Drops user's cached decision on a task in every worker"""
+
+    invalidate(access_cache.name, "invalidate", [user_id, task_id])
+
+
+def invalidate_task_access(task_id: int):
+    """ Drops cached decisions of all users on a task in every worker"""
+
+    invalidate(access_cache.name, "invalidate_task", task_id)
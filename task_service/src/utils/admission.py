@@ -0,0 +1,34 @@
+from fastapi import status
+from fastapi.responses import JSONResponse
+
+from config import settings
+from database import engine, TimedQueuePool
+from utils import metrics
+
+EXEMPT_PATHS = ("/metrics", "/cache/stats")
+
+
+def overloaded_response() -> JSONResponse:
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        content="Service is overloaded, retry later",
+                        headers={"Retry-After": str(settings.load_shedding_retry_after)})
+
+
+class LoadSheddingMiddleware:
+    """ Rejects new requests with 503 instead of queueing them while the connection pool is saturated"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] == "http" and scope["path"] not in EXEMPT_PATHS
+                and isinstance(engine.pool, TimedQueuePool) and engine.pool.is_saturated()):
+            metrics.shed_requests.inc(scope["method"])
+            return await overloaded_response()(scope, receive, send)
+        await self.app(scope, receive, send)
+
+
+async def pool_timeout_handler(request, exc):
+    """ Request waited for a connection longer than pool timeout"""
+
+    return overloaded_response()
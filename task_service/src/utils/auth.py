@@ -8,6 +8,9 @@ from fastapi.responses import JSONResponse
 
 from database import get_session
 from tables.user_dao import UserDao
+from utils.cache import TTLCache
+
+user_cache = TTLCache("user", max_size=settings.user_cache_size, ttl=settings.user_cache_ttl)
 
 
 async def get_user(token: str = Header(...), session: AsyncSession = Depends(get_session)) -> UserDao:
@@ -20,7 +23,7 @@ async def get_user(token: str = Header(...), session: AsyncSession = Depends(get
         )
     try:
         data = jwt.decode(token, settings.jwt_secret_key, algorithms=settings.algorithm)
-    except jwt.DecodeError:
+    except jwt.InvalidTokenError:
         return JSONResponse(
             status_code=status.HTTP_401_UNAUTHORIZED,
             content="Invalid Session key"
@@ -31,11 +34,15 @@ async def get_user(token: str = Header(...), session: AsyncSession = Depends(get
             status_code=status.HTTP_401_UNAUTHORIZED,
             content="Invalid Session key"
         )
-    user: UserDao = (
+    user: UserDao = user_cache.get(user_id)
+    if user:
+        return user
+    user = (
         await session.execute(select(UserDao).where(UserDao.id == user_id))).unique().scalars().one_or_none()
     if not user:
         return JSONResponse(
             status_code=status.HTTP_401_UNAUTHORIZED,
             content="Invalid Session key"
         )
+    user_cache.set(user_id, user)
     return user
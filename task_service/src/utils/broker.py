@@ -0,0 +1,154 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+
+from config import settings
+from utils.cache import caches
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_METHODS = ("invalidate", "invalidate_task", "clear")
+MAX_PENDING_INVALIDATIONS = 1000
+RETRY_DELAY = 0.01
+
+
+def apply_invalidation(message: dict):
+    """ Applies invalidation message to a cache of this process"""
+
+    cache = caches.get(message.get("cache"))
+    if cache is None or message.get("method") not in INVALIDATION_METHODS:
+        return
+    args = [tuple(arg) if isinstance(arg, list) else arg for arg in message.get("args", [])]
+    getattr(cache, message["method"])(*args)
+
+
+class Broker:
+    """ Delivers cache invalidations inside a single worker"""
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def publish(self, message: dict):
+        pass
+
+
+class _Receiver(asyncio.DatagramProtocol):
+    def datagram_received(self, data: bytes, addr):
+        try:
+            apply_invalidation(json.loads(data))
+        except ValueError:
+            logger.warning("Malformed invalidation message %r", data)
+
+
+class UnixSocketBroker(Broker):
+    """ Local stand-in for a message broker: every worker binds a datagram socket
+    in a shared directory and publishes invalidations to all other sockets there"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, f"{os.getpid()}.sock")
+        self._transport = None
+        self._sender = None
+        self._pending: dict[str, list[dict]] = {}
+        self._retry: asyncio.TimerHandle | None = None
+
+    async def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+            _Receiver, local_addr=self.path, family=socket.AF_UNIX)
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setblocking(False)
+
+    async def stop(self):
+        if self._retry is not None:
+            self._retry.cancel()
+            self._retry = None
+        if self._transport is not None:
+            self._transport.close()
+            self._sender.close()
+            self._transport = self._sender = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def publish(self, message: dict):
+        if self._sender is None:
+            return
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if path == self.path or not name.endswith(".sock"):
+                continue
+            if path in self._pending:
+                # Keep order behind invalidations that are not delivered yet
+                self._enqueue(path, message)
+            elif not self._send(path, message):
+                self._enqueue(path, message)
+
+    def _send(self, path: str, message: dict) -> bool:
+        """ Sends message to a worker, returns False if its socket buffer is full"""
+
+        try:
+            self._sender.sendto(json.dumps(message).encode(), path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            # Socket of a stopped worker
+            self._pending.pop(path, None)
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        except BlockingIOError:
+            return False
+        return True
+
+    def _enqueue(self, path: str, message: dict):
+        """ Keeps undelivered invalidation for retry. When too many pile up for a busy worker
+        they are replaced with clearing the whole caches, which is never stale"""
+
+        pending = self._pending.setdefault(path, [])
+        pending.append(message)
+        if len(pending) > MAX_PENDING_INVALIDATIONS:
+            logger.warning("Worker %s is behind on invalidations, its caches will be cleared", path)
+            cache_names = dict.fromkeys(pending_message["cache"] for pending_message in pending)
+            pending[:] = [{"cache": name, "method": "clear", "args": []} for name in cache_names]
+        if self._retry is None:
+            self._retry = asyncio.get_running_loop().call_later(RETRY_DELAY, self._flush)
+
+    def _flush(self):
+        """ Retries undelivered invalidations in order"""
+
+        self._retry = None
+        if self._sender is None:
+            return
+        for path in list(self._pending):
+            pending = self._pending[path]
+            while pending and self._send(path, pending[0]):
+                if path not in self._pending:
+                    break
+                pending.pop(0)
+            if not pending:
+                self._pending.pop(path, None)
+        if self._pending:
+            self._retry = asyncio.get_running_loop().call_later(RETRY_DELAY, self._flush)
+
+
+def create_broker() -> Broker:
+    if settings.cache_broker == "unix":
+        return UnixSocketBroker(settings.cache_broker_path)
+    return Broker()
+
+
+broker = create_broker()
+
+
+def invalidate(cache_name: str, method: str, *args):
+    """ Invalidates cache entries in this worker and publishes invalidation to other workers"""
+
+    message = {"cache": cache_name, "method": method, "args": list(args)}
+    apply_invalidation(message)
+    broker.publish(message)
@@ -0,0 +1,69 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+caches: dict[str, "TTLCache"] = {}
+
+EVICTION_POLICIES = ("lru", "fifo")
+
+
+class TTLCache:
+    """ Bounded in-process cache with expiring entries and hit/miss counters.
+    lru policy evicts least recently used entries, fifo evicts the oldest inserted ones"""
+
+    def __init__(self, name: str, max_size: int, ttl: float, policy: str = "lru"):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy {policy}, expected one of {EVICTION_POLICIES}")
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        caches[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """ Returns cached value or default if it is missing or expired"""
+
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+                self._removed(key)
+            self.misses += 1
+            return default
+        if self.policy == "lru":
+            self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        """ Stores value, evicting entries over max_size according to the policy"""
+
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            evicted, _ = self._entries.popitem(last=False)
+            self._removed(evicted)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """ Drops a single entry"""
+
+        if self._entries.pop(key, None) is not None:
+            self._removed(key)
+
+    def clear(self):
+        """ Drops all entries"""
+
+        for key in list(self._entries):
+            self.invalidate(key)
+
+    def _removed(self, key: Hashable):
+        """ Hook for subclasses keeping secondary indexes over keys"""
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._entries), "max_size": self.max_size, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
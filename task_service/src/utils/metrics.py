@@ -0,0 +1,159 @@
+import time
+from contextvars import ContextVar
+from typing import Callable
+
+from utils.cache import caches
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+metrics: list["Counter | Gauge | Histogram"] = []
+
+# Number of SQL statements executed while handling the current request
+request_queries: ContextVar[list[int] | None] = ContextVar("request_queries", default=None)
+
+
+def _labels(labelnames: tuple[str, ...], labelvalues: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """ Monotonic counter with labels in Prometheus text format"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        metrics.append(self)
+
+    def inc(self, *labelvalues, amount: float = 1):
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labelvalues, value in self._values.items():
+            lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {value}")
+        return lines
+
+
+class Gauge:
+    """ Gauge whose labelled values are read from a callback at scrape time"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...],
+                 collect: Callable[[], dict[tuple, float]]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.collect = collect
+        metrics.append(self)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        for labelvalues, value in self.collect().items():
+            lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {value}")
+        return lines
+
+
+class Histogram:
+    """ Cumulative histogram with labels in Prometheus text format"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+        metrics.append(self)
+
+    def observe(self, value: float, *labelvalues):
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [0] * (len(self.buckets) + 2)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labelvalues, series in self._series.items():
+            for bound, count in zip(self.buckets, series):
+                labels = _labels(self.labelnames, labelvalues, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _labels(self.labelnames, labelvalues, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labelvalues)} {series[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labelvalues)} {series[-1]}")
+        return lines
+
+
+request_duration = Histogram("http_request_duration_seconds", "Latency of HTTP requests by route",
+                             ("method", "route", "status"))
+request_query_count = Histogram("http_request_queries", "SQL statements executed per HTTP request",
+                                ("method", "route"), buckets=(0, 1, 2, 3, 4, 5, 7, 10, 20, 50))
+query_duration = Histogram("db_query_duration_seconds", "Latency of SQL statements by kind", ("statement",))
+pool_checkout_wait = Histogram("db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection")
+shed_requests = Counter("http_requests_shed_total", "Requests rejected with 503 while the pool is saturated",
+                        ("method",))
+
+
+def render_metrics() -> str:
+    """ Returns all metrics and cache counters in Prometheus text format"""
+
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    for field, kind in (("hits", "counter"), ("misses", "counter"), ("evictions", "counter"), ("size", "gauge")):
+        lines.append(f"# TYPE cache_{field} {kind}")
+        for name, cache in caches.items():
+            lines.append(f'cache_{field}{{cache="{name}"}} {cache.stats()[field]}')
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ Records latency, status and number of SQL statements of every HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        queries = [0]
+        token = request_queries.set(queries)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            request_queries.reset(token)
+            route = scope.get("route")
+            # Route template instead of raw path keeps label cardinality bounded
+            route = route.path if route is not None else "unmatched"
+            request_duration.observe(elapsed, scope["method"], route, str(status[0]))
+            request_query_count.observe(queries[0], scope["method"], route)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+    queries = request_queries.get()
+    if queries is not None:
+        queries[0] += 1
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    kind = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+    query_duration.observe(time.perf_counter() - context._query_started, kind)
@@ -1,15 +1,54 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
 from passlib.context import CryptContext
 
-password_context = CryptContext(schemes=["sha256_crypt", "md5_crypt"])
+from config import settings
+
+password_context = CryptContext(schemes=["sha256_crypt", "md5_crypt"],
+                                deprecated=["md5_crypt"],
+                                sha256_crypt__default_rounds=settings.password_hash_rounds)
+
+_executor: Executor | None = None
+
+
+def get_executor() -> Executor:
+    """ Returns worker pool for hashing, sha256_crypt rounds must not block the event loop"""
+
+    global _executor
+    if _executor is None:
+        if settings.password_hash_executor == "process":
+            _executor = ProcessPoolExecutor(max_workers=settings.password_hash_workers)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=settings.password_hash_workers,
+                                           thread_name_prefix="password-hash")
+    return _executor
+
+
+def shutdown_executor():
+    """ Stops hashing workers"""
+
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _hash(password: str) -> str:
+    return password_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed: str) -> tuple[bool, str | None]:
+    return password_context.verify_and_update(password, hashed)
 
 
-def encrypt_password(password: str) -> str:
-    """ Encrypts password"""
+async def encrypt_password(password: str) -> str:
+    """ Encrypts password in the hashing pool"""
 
-    return password_context.encrypt(password)
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), _hash, password)
 
 
-def check_encrypted_password(password: str, hashed: str) -> bool:
-    """ Decrypts password"""
+async def check_encrypted_password(password: str, hashed: str) -> tuple[bool, str | None]:
+    """ Checks password in the hashing pool. Returns validity and a new hash if the old scheme is deprecated"""
 
-    return password_context.verify(password, hashed)
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), _verify_and_update, password, hashed)
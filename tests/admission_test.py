@@ -0,0 +1,52 @@
+import asyncio
+import os
+import sys
+import tempfile
+
+# Service is driven in-process with a single-connection pool on a local SQLite database
+database_path = os.path.join(tempfile.mkdtemp(), "admission.db")
+os.environ.update(DATABASE_URL=f"sqlite+aiosqlite:///{database_path}",
+                  DATABASE_POOL_SIZE="1",
+                  DATABASE_MAX_OVERFLOW="0",
+                  DATABASE_POOL_TIMEOUT="0.5",
+                  LOAD_SHEDDING_WAIT_THRESHOLD="0.1")
+os.environ.setdefault("JWT_SECRET_KEY", "admission_test_secret")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "task_service", "src"))
+
+import httpx  # noqa: E402
+
+from database import engine, init_models  # noqa: E402
+from main import app  # noqa: E402
+
+
+async def shed_requests():
+    await init_models()
+    transport = httpx.ASGITransport(app=app)
+    login = {"login": "nobody", "password": "password"}
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            resp = await client.post("/user/authentication", json=login)
+            assert resp.status_code == 404
+
+            # Only connection of the pool is busy
+            async with engine.connect():
+                # Request waits for the connection up to pool timeout
+                timed_out = await client.post("/user/authentication", json=login)
+                # Saturated pool sheds the next request without queueing it
+                shed = await client.post("/user/authentication", json=login)
+                metrics = await client.get("/metrics")
+    finally:
+        await engine.dispose()
+    return timed_out, shed, metrics
+
+
+def test_load_shedding():
+    """ Tests that requests get fast 503 with Retry-After while the pool is saturated"""
+
+    timed_out, shed, metrics = asyncio.run(shed_requests())
+    assert timed_out.status_code == 503
+    assert timed_out.headers["Retry-After"] == "1"
+    assert shed.status_code == 503
+    assert shed.headers["Retry-After"] == "1"
+    assert 'http_requests_shed_total{method="POST"} 1' in metrics.text
+    assert 'db_pool_connections{state="checked_out"} 1' in metrics.text
@@ -139,3 +139,143 @@ def test_rights_deleting():
     # Can't delete rights that was not given
     resp = requests.delete(task_service_url + '/permission/second_user/1', headers=user_authentication(1))
     assert resp.status_code == 404
+
+
+def test_task_listing():
+    """ Tests that user lists owned and shared tasks page by page"""
+
+    resp = requests.get(task_service_url + '/task', headers=user_authentication(1))
+    assert resp.status_code == 200
+    assert [task["id"] for task in resp.json()["tasks"]] == [1, 3]
+    assert resp.json()["next_cursor"] is None
+
+    resp = requests.get(task_service_url + '/task', params={"limit": 2}, headers=user_authentication(2))
+    assert resp.status_code == 200
+    assert [task["id"] for task in resp.json()["tasks"]] == [4, 5]
+    next_cursor = resp.json()["next_cursor"]
+    assert next_cursor == 5
+
+    resp = requests.get(task_service_url + '/task', params={"limit": 2, "after": next_cursor},
+                        headers=user_authentication(2))
+    assert resp.status_code == 200
+    assert [task["id"] for task in resp.json()["tasks"]] == [6]
+    assert resp.json()["next_cursor"] is None
+
+    resp = requests.get(task_service_url + '/task', params={"access_mode": 1}, headers=user_authentication(2))
+    assert resp.status_code == 200
+    assert resp.json()["tasks"] == []
+
+    resp = requests.get(task_service_url + '/task', params={"access_mode": 3}, headers=user_authentication(2))
+    assert resp.status_code == 400
+
+
+def test_batch_tasks():
+    """ Tests creating, updating and deleting tasks in batches with per-item results"""
+
+    resp = requests.post(task_service_url + '/task/batch', json=[
+        {"title": "batch_title", "content": "batch_content"} for _ in range(3)
+    ], headers=user_authentication(1))
+    assert resp.status_code == 201
+    task_ids = [item["task_id"] for item in resp.json()]
+    assert task_ids == [7, 8, 9]
+    assert all(item["status_code"] == 201 for item in resp.json())
+
+    resp = requests.put(task_service_url + '/task/batch', json=[
+        {"task_id": 7, "new_title": "new_title", "new_content": "new_content"},
+        {"task_id": 4, "new_title": "new_title", "new_content": "new_content"},
+        {"task_id": 100, "new_title": "new_title", "new_content": "new_content"}
+    ], headers=user_authentication(1))
+    assert resp.status_code == 200
+    assert [item["status_code"] for item in resp.json()] == [200, 403, 404]
+
+    resp = requests.get(task_service_url + '/task/7', headers=user_authentication(1))
+    assert resp.json()["title"] == "new_title"
+
+    resp = requests.delete(task_service_url + '/task/batch', json=[8, 9, 4], headers=user_authentication(1))
+    assert resp.status_code == 200
+    assert [item["status_code"] for item in resp.json()] == [204, 204, 403]
+
+    resp = requests.get(task_service_url + '/task/8', headers=user_authentication(1))
+    assert resp.status_code == 404
+
+
+def test_user_cache():
+    """ Tests that repeated requests of the same user are served from user cache"""
+
+    headers = user_authentication(1)
+    requests.get(task_service_url + '/task/1', headers=headers)
+    hits = requests.get(task_service_url + '/cache/stats').json()["user"]["hits"]
+    resp = requests.get(task_service_url + '/task/1', headers=headers)
+    assert resp.status_code == 200
+    assert requests.get(task_service_url + '/cache/stats').json()["user"]["hits"] == hits + 1
+
+
+def test_access_cache_invalidation():
+    """ Tests that cached access decisions follow giving and taking away rights"""
+
+    resp = requests.get(task_service_url + '/task/1', headers=user_authentication(2))
+    assert resp.status_code == 403
+
+    resp = requests.post(task_service_url + '/permission', json={
+        "access_user_login": "second_user",
+        "task_id": 1,
+        "access_mode": 1
+    }, headers=user_authentication(1))
+    assert resp.status_code == 201
+    resp = requests.get(task_service_url + '/task/1', headers=user_authentication(2))
+    assert resp.status_code == 200
+
+    resp = requests.delete(task_service_url + '/permission/second_user/1', headers=user_authentication(1))
+    assert resp.status_code == 204
+    resp = requests.get(task_service_url + '/task/1', headers=user_authentication(2))
+    assert resp.status_code == 403
+
+
+def test_task_search():
+    """ Tests full-text search over available tasks with cursor pagination"""
+
+    headers = user_authentication(1)
+    for title, content in [("Quarterly report", "prepare the quarterly report for finance"),
+                           ("Report draft", "first draft"),
+                           ("Groceries", "milk and bread")]:
+        resp = requests.post(task_service_url + '/task', json={"title": title, "content": content}, headers=headers)
+        assert resp.status_code == 201
+
+    resp = requests.get(task_service_url + '/task/search', params={"q": "report", "limit": 1}, headers=headers)
+    assert resp.status_code == 200
+    first_page = resp.json()
+    assert first_page["tasks"][0]["title"] == "Quarterly report"
+    assert first_page["next_cursor"]
+
+    resp = requests.get(task_service_url + '/task/search', params={"q": "report", "after": first_page["next_cursor"]},
+                        headers=headers)
+    assert resp.status_code == 200
+    assert [task["title"] for task in resp.json()["tasks"]] == ["Report draft"]
+    assert resp.json()["next_cursor"] is None
+
+    # Other users don't find tasks they can't access
+    resp = requests.get(task_service_url + '/task/search', params={"q": "report"}, headers=user_authentication(2))
+    assert resp.status_code == 200
+    assert resp.json()["tasks"] == []
+
+
+def test_metrics():
+    """ Tests that request latencies and SQL statements are exposed in Prometheus format"""
+
+    requests.get(task_service_url + '/task/1', headers=user_authentication(1))
+    resp = requests.get(task_service_url + '/metrics')
+    assert resp.status_code == 200
+    assert 'http_request_duration_seconds_count{method="GET",route="/task/{task_id}",status="200"}' in resp.text
+    assert 'db_query_duration_seconds_count{statement="SELECT"}' in resp.text
+    queries = [line for line in resp.text.splitlines()
+               if line.startswith('http_request_queries_sum{method="GET",route="/task/{task_id}"}')]
+    assert queries and float(queries[0].split()[-1]) > 0
+
+
+def test_pool_metrics():
+    """ Tests that connection pool occupancy is exposed"""
+
+    resp = requests.get(task_service_url + '/metrics')
+    assert resp.status_code == 200
+    assert 'db_pool_connections{state="size"}' in resp.text
+    assert 'db_pool_connections{state="checked_out"}' in resp.text